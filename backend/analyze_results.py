@@ -1,29 +1,43 @@
+import importlib.util
 import sys
 
 import pandas as pd
 
 
 def main(path: str) -> None:
-    df = pd.read_csv(path)
+    # Read just the header first so the full parse can be limited to the needed columns
+    columns = list(pd.read_csv(path, nrows=0).columns)
 
-    print("Columns:", list(df.columns))
+    print("Columns:", columns)
 
     # Adjust these if your exporter uses different names
     area_col = "area_sqft"
     type_col = "type"  # e.g. 'concrete', 'asphalt', 'building', 'pervious'
 
-    if area_col not in df.columns or type_col not in df.columns:
+    if area_col not in columns or type_col not in columns:
         print("\nExpected columns not found. Available columns:")
-        for c in df.columns:
+        for c in columns:
             print(" -", c)
         return
 
+    read_kwargs = {"usecols": [area_col, type_col]}
+    if importlib.util.find_spec("pyarrow") is not None:
+        # Multithreaded C++ parser, much faster on large result files
+        read_kwargs.update(engine="pyarrow", dtype_backend="pyarrow")
+
+    df = pd.read_csv(path, **read_kwargs)
+    df[type_col] = df[type_col].astype("category")
+
     total_area = df[area_col].sum()
     print(f"\nTotal area (sf): {total_area:,.2f}")
 
     print("\nArea by type (sf):")
-    by_type = df.groupby(type_col)[area_col].sum().sort_values(ascending=False)
-    for t, a in by_type.items():
+    by_type = (
+        df.groupby(type_col, sort=False, observed=True)[area_col]
+        .sum()
+        .sort_values(ascending=False)
+    )
+    for t, a in zip(by_type.index.to_numpy(), by_type.to_numpy()):
         print(f" - {t}: {a:,.2f}")
 
 
@@ -5,11 +5,16 @@ FastAPI Backend for PDF-based area extraction and classification
 
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from anyio import to_thread
 import os
 import uuid
 import shutil
 import threading
+import multiprocessing
+from itertools import compress
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Dict, Any
 
 from modules.pdf_reader import pdf_to_images
@@ -18,14 +23,16 @@ from modules.classifier import classify_polygon
 from modules.scaler import detect_scale, scale_polygon_area
 from modules.exporter import export_to_csv, export_to_geojson
 from modules.analyzer import needs_review, calculate_confidence
-from modules.image_handler import encode_image_to_base64, get_image_dimensions
-from modules.vector_extractor import extract_vectors_from_pdf, get_page_as_image_base64
+from modules.image_handler import encode_image_to_base64, get_image_dimensions, SURFACE_TYPES, TYPE_CODE
+from modules.vector_extractor import extract_vectors_from_pdf, extract_page_vectors, get_page_as_image_base64
 import fitz  # PyMuPDF
+import numpy as np
 
 app = FastAPI(
     title="LCR Area Calculations - Module A",
     description="PDF-based area extraction for landscape coverage ratio calculations",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for React frontend
@@ -45,6 +52,44 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 JOBS: Dict[str, Dict[str, Any]] = {}
 JOBS_LOCK = threading.Lock()
 
+# One page-processing pool shared by every job, so concurrent requests queue
+# for at most cpu_count workers instead of each starting their own. Workers
+# are spawned rather than forked: forking the multithreaded server can
+# deadlock on locks held by other threads
+_PAGE_POOL: ProcessPoolExecutor | None = None
+_PAGE_POOL_LOCK = threading.Lock()
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    """Return the shared page-processing pool, creating it on first use."""
+    global _PAGE_POOL
+    with _PAGE_POOL_LOCK:
+        if _PAGE_POOL is None:
+            _PAGE_POOL = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _PAGE_POOL
+
+
+def _discard_page_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next job starts a fresh one."""
+    global _PAGE_POOL
+    with _PAGE_POOL_LOCK:
+        if _PAGE_POOL is pool:
+            _PAGE_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@app.on_event("shutdown")
+def _shutdown_page_pool():
+    """Stop the page-processing workers with the server."""
+    global _PAGE_POOL
+    with _PAGE_POOL_LOCK:
+        pool, _PAGE_POOL = _PAGE_POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
 
 @app.get("/")
 async def root():
@@ -56,17 +101,139 @@ async def root():
     }
 
 
+def _render_page_image(pdf_path: str, page_idx: int, dpi: int) -> str:
+    """
+    Render a page to a base64 image using a private document handle.
+
+    A fitz.Page must only be touched from one thread at a time, so the
+    render thread can't share the page used for vector extraction.
+    """
+
+    doc = fitz.open(pdf_path)
+    try:
+        return get_page_as_image_base64(doc[page_idx], dpi=dpi, fmt="jpeg")
+    finally:
+        doc.close()
+
+
+def _process_one_page(pdf_path: str, page_idx: int, sheet_number: int) -> Dict[str, Any]:
+    """
+    Extract, render and aggregate a single PDF page.
+
+    Runs in a worker process, so it opens its own document handle
+    (MuPDF pages can't be pickled or shared across processes).
+    Returns plain data only.
+    """
+
+    print(f"Processing sheet {sheet_number}")
+
+    doc = fitz.open(pdf_path)
+    try:
+        page = doc[page_idx]
+
+        # Render the page image in the background while vectors are extracted
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            image_future = executor.submit(_render_page_image, pdf_path, page_idx, 150)
+
+            # Extract vector geometry from this page
+            page_data = extract_page_vectors(page, sheet_number)
+
+            # Render page to image for visualization
+            try:
+                sheet_image_base64 = image_future.result()
+            except Exception as e:
+                print(f"  Warning: Failed to render page image: {e}")
+                sheet_image_base64 = None
+
+        pdf_width = page.rect.width
+        pdf_height = page.rect.height
+    finally:
+        doc.close()
+
+    polygons = page_data["polygons"]
+    areas = np.fromiter((poly["area_sqft"] for poly in polygons), dtype=np.float64, count=len(polygons))
+
+    # Skip very small polygons (< 50 sqft, likely noise)
+    keep = areas >= 50
+
+    sheet_results = []
+    type_codes = []
+
+    # Process extracted polygons
+    for poly in compress(polygons, keep):
+        # Ensure surface_type is valid
+        type_code = TYPE_CODE.get(poly["type"], TYPE_CODE["pervious"])
+        surface_type = SURFACE_TYPES[type_code]
+
+        # Keep coordinates in PDF space - frontend will transform them
+        poly_result = {
+            "id": poly["id"],
+            "sheet": sheet_number,
+            "type": surface_type,
+            "type_code": type_code,
+            "area_sqft": round(poly["area_sqft"], 2),
+            "coords_pdf": poly["coordinates"],  # Native PDF coordinates
+            "coordinates": poly["coordinates"],  # Alias for backward compatibility
+            "bbox_pdf": poly["bbox"],  # Native PDF bbox
+            "bbox": poly["bbox"],  # Alias for backward compatibility
+            "review_needed": False,
+            "review_reasons": [],
+            "confidence": 0.9,  # Vector extraction is high confidence
+            "vertex_count": len(poly["coordinates"]),
+            "source": poly.get("source", "vector")
+        }
+
+        sheet_results.append(poly_result)
+        type_codes.append(type_code)
+
+    # Sum areas per surface type in one pass
+    type_totals = np.bincount(
+        np.asarray(type_codes, dtype=np.intp),
+        weights=areas[keep],
+        minlength=len(SURFACE_TYPES)
+    )
+    sheet_areas = dict(zip(SURFACE_TYPES, type_totals.tolist()))
+
+    # Add sheet summary with PDF dimensions for frontend coordinate transformation
+    sheet_summary = {
+        "sheet_number": sheet_number,
+        "image_base64": sheet_image_base64,
+        "pdf_width": pdf_width,   # Native PDF width
+        "pdf_height": pdf_height, # Native PDF height
+        "polygons_count": len(sheet_results),
+        "scale_feet_per_pdf_unit": page_data.get("scale_factor", 1.0),
+        "polygons": sheet_results,
+        "sheet_totals": {
+            "impervious": round(sheet_areas["concrete"] + sheet_areas["asphalt"] + sheet_areas["building"], 2),
+            "pervious": round(sheet_areas["pervious"], 2),
+            "breakdown": {
+                "concrete": round(sheet_areas["concrete"], 2),
+                "asphalt": round(sheet_areas["asphalt"], 2),
+                "building": round(sheet_areas["building"], 2),
+                "pervious": round(sheet_areas["pervious"], 2)
+            }
+        }
+    }
+
+    return {
+        "sheet_summary": sheet_summary,
+        "sheet_areas": sheet_areas
+    }
+
+
 def _process_pdf_internal(pdf_path: str, file_id: str, original_filename: str, job_id: str | None = None) -> Dict[str, Any]:
     """
     Core PDF processing logic using VECTOR EXTRACTION.
     Reads actual CAD geometry directly from the PDF instead of image processing.
+    Pages are processed in parallel worker processes and reassembled in sheet order.
     """
 
     print(f"Extracting vectors from PDF: {original_filename}")
     
-    # Open PDF with PyMuPDF
+    # Open PDF with PyMuPDF just to count pages; workers open their own handles
     doc = fitz.open(pdf_path)
     total_sheets = len(doc)
+    doc.close()
     print(f"PDF has {total_sheets} pages")
 
     all_results: List[Dict[str, Any]] = []
@@ -83,6 +250,7 @@ def _process_pdf_internal(pdf_path: str, file_id: str, original_filename: str, j
     # Sheet numbers are 1-indexed for user convenience
     SHEETS_TO_PROCESS = None  # Set to [2, 4, 5] to limit processing
 
+    pages_to_process = []
     for page_idx in range(total_sheets):
         sheet_number = page_idx + 1
         
@@ -90,98 +258,57 @@ def _process_pdf_internal(pdf_path: str, file_id: str, original_filename: str, j
         if SHEETS_TO_PROCESS is not None and sheet_number not in SHEETS_TO_PROCESS:
             print(f"Skipping sheet {sheet_number}/{total_sheets} (not in filter)")
             continue
-            
-        print(f"Processing sheet {sheet_number}/{total_sheets}")
-
-        if job_id is not None:
-            with JOBS_LOCK:
-                job = JOBS.get(job_id)
-                if job:
-                    job["current_sheet"] = sheet_number
-                    job["total_sheets"] = total_sheets
 
-        page = doc[page_idx]
-        
-        # Extract vector geometry from this page
-        from modules.vector_extractor import extract_page_vectors
-        page_data = extract_page_vectors(page, sheet_number)
-        
-        # Render page to image for visualization
-        try:
-            sheet_image_base64 = get_page_as_image_base64(page, dpi=150)
-        except Exception as e:
-            print(f"  Warning: Failed to render page image: {e}")
-            sheet_image_base64 = None
-
-        sheet_results = []
-        sheet_areas = {
-            "concrete": 0.0,
-            "building": 0.0,
-            "pervious": 0.0,
-            "asphalt": 0.0,
-            "water": 0.0
-        }
+        pages_to_process.append((page_idx, sheet_number))
 
-        # Process extracted polygons
-        for poly in page_data["polygons"]:
-            area_sqft = poly["area_sqft"]
-            surface_type = poly["type"]
-            
-            # Skip very small polygons (< 50 sqft, likely noise)
-            if area_sqft < 50:
-                continue
-            
-            # Ensure surface_type is valid
-            if surface_type not in total_areas:
-                surface_type = "pervious"
-
-            # Keep coordinates in PDF space - frontend will transform them
-            poly_result = {
-                "id": poly["id"],
-                "sheet": sheet_number,
-                "type": surface_type,
-                "area_sqft": round(area_sqft, 2),
-                "coords_pdf": poly["coordinates"],  # Native PDF coordinates
-                "coordinates": poly["coordinates"],  # Alias for backward compatibility
-                "bbox_pdf": poly["bbox"],  # Native PDF bbox
-                "bbox": poly["bbox"],  # Alias for backward compatibility
-                "review_needed": False,
-                "review_reasons": [],
-                "confidence": 0.9,  # Vector extraction is high confidence
-                "vertex_count": len(poly["coordinates"]),
-                "source": poly.get("source", "vector")
-            }
-
-            sheet_results.append(poly_result)
-            total_areas[surface_type] += area_sqft
-            sheet_areas[surface_type] += area_sqft
-
-        all_results.extend(sheet_results)
-
-        # Add sheet summary with PDF dimensions for frontend coordinate transformation
-        sheet_summary = {
-            "sheet_number": sheet_number,
-            "image_base64": sheet_image_base64,
-            "pdf_width": page.rect.width,   # Native PDF width
-            "pdf_height": page.rect.height, # Native PDF height
-            "polygons_count": len(sheet_results),
-            "scale_feet_per_pdf_unit": page_data.get("scale_factor", 1.0),
-            "polygons": sheet_results,
-            "sheet_totals": {
-                "impervious": round(sheet_areas["concrete"] + sheet_areas["asphalt"] + sheet_areas["building"], 2),
-                "pervious": round(sheet_areas["pervious"], 2),
-                "breakdown": {
-                    "concrete": round(sheet_areas["concrete"], 2),
-                    "asphalt": round(sheet_areas["asphalt"], 2),
-                    "building": round(sheet_areas["building"], 2),
-                    "pervious": round(sheet_areas["pervious"], 2)
-                }
-            }
+    if job_id is not None:
+        with JOBS_LOCK:
+            job = JOBS.get(job_id)
+            if job:
+                # Sheets finish out of order in the process pool, so progress is
+                # reported as a count of completed sheets out of those selected
+                job["sheets_completed"] = 0
+                job["total_sheets"] = len(pages_to_process)
+
+    page_outputs: Dict[int, Dict[str, Any]] = {}
+
+    if pages_to_process:
+        executor = _get_page_pool()
+        futures = {
+            executor.submit(_process_one_page, pdf_path, page_idx, sheet_number): sheet_number
+            for page_idx, sheet_number in pages_to_process
         }
 
+        try:
+            for completed, future in enumerate(as_completed(futures), start=1):
+                sheet_number = futures[future]
+                page_outputs[sheet_number] = future.result()
+                print(f"Finished sheet {sheet_number}/{total_sheets}")
+
+                if job_id is not None:
+                    with JOBS_LOCK:
+                        job = JOBS.get(job_id)
+                        if job:
+                            job["sheets_completed"] = completed
+        except BrokenProcessPool:
+            _discard_page_pool(executor)
+            raise
+        except BaseException:
+            # Don't leave this job's remaining pages queued in the shared pool
+            for future in futures:
+                future.cancel()
+            raise
+
+    # Reassemble results in sheet order
+    for sheet_number in sorted(page_outputs):
+        page_output = page_outputs[sheet_number]
+        sheet_summary = page_output["sheet_summary"]
+
+        all_results.extend(sheet_summary["polygons"])
         sheets_data.append(sheet_summary)
-    
-    doc.close()
+
+        for surface_type, area in page_output["sheet_areas"].items():
+            total_areas[surface_type] += area
 
     # Step 3: Compute summary statistics
     total_impervious = round(
@@ -226,8 +353,12 @@ def _process_pdf_internal(pdf_path: str, file_id: str, original_filename: str, j
     csv_path = os.path.join(UPLOAD_DIR, f"{file_id}_results.csv")
     geojson_path = os.path.join(UPLOAD_DIR, f"{file_id}_results.geojson")
 
-    export_to_csv(all_results, summary, csv_path)
-    export_to_geojson(all_results, geojson_path)
+    # The two exports are independent; write them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        csv_future = executor.submit(export_to_csv, all_results, summary, csv_path)
+        geojson_future = executor.submit(export_to_geojson, all_results, geojson_path)
+        csv_future.result()
+        geojson_future.result()
 
     result: Dict[str, Any] = {
         "success": True,
@@ -261,8 +392,11 @@ async def process_pdf(file: UploadFile = File(...)):
         with open(pdf_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
 
-        result = _process_pdf_internal(pdf_path, file_id, file.filename)
-        return JSONResponse(content=result)
+        # Run the CPU-heavy processing on a worker thread so the event loop
+        # keeps serving other requests (e.g. job status polling)
+        result = await to_thread.run_sync(_process_pdf_internal, pdf_path, file_id, file.filename)
+        # Returned as a response object so FastAPI skips jsonable_encoder on the large payload
+        return ORJSONResponse(content=result)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
@@ -314,7 +448,7 @@ async def start_process(file: UploadFile = File(...)):
     with JOBS_LOCK:
         JOBS[job_id] = {
             "status": "queued",
-            "current_sheet": 0,
+            "sheets_completed": 0,
             "total_sheets": 0,
             "filename": file.filename
         }
@@ -331,7 +465,13 @@ async def start_process(file: UploadFile = File(...)):
 
 @app.get("/api/process/status/{job_id}")
 async def get_process_status(job_id: str):
-    """Return progress information for a given processing job."""
+    """
+    Return progress information for a given processing job.
+
+    Progress is sheets_completed out of total_sheets. Sheets are processed in
+    parallel and finish in any order, so this replaces the old current_sheet
+    (the sheet number being processed).
+    """
 
     with JOBS_LOCK:
         job = JOBS.get(job_id)
@@ -341,7 +481,7 @@ async def get_process_status(job_id: str):
 
     response: Dict[str, Any] = {
         "status": job.get("status"),
-        "current_sheet": job.get("current_sheet", 0),
+        "sheets_completed": job.get("sheets_completed", 0),
         "total_sheets": job.get("total_sheets", 0),
         "filename": job.get("filename"),
     }
@@ -351,7 +491,8 @@ async def get_process_status(job_id: str):
     if job.get("status") == "error":
         response["error"] = job.get("error")
 
-    return response
+    # Returned as a response object so FastAPI skips jsonable_encoder on the completed result
+    return ORJSONResponse(content=response)
 
 
 @app.get("/api/health")
@@ -360,7 +501,7 @@ async def health_check():
     return {
         "status": "healthy",
         "dependencies": {
-            "pdf2image": "available",
+            "pymupdf": "available",
             "opencv": "available",
             "tesseract": "available",
             "shapely": "available"
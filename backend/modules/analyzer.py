@@ -4,8 +4,39 @@ Analyzes polygons for quality issues and generates review flags
 """
 
 import numpy as np
-from typing import Dict, Any, List
-import cv2
+import numba
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+
+@numba.njit(cache=True, fastmath=True)
+def _shoelace_and_perim(pts: np.ndarray) -> Tuple[float, float]:
+    """Area (shoelace) and closed perimeter of an (N, 2) float64 point array."""
+    a = 0.0
+    p = 0.0
+    n = pts.shape[0]
+    for i in range(n):
+        x1, y1 = pts[i, 0], pts[i, 1]
+        x2, y2 = pts[(i + 1) % n, 0], pts[(i + 1) % n, 1]
+        a += x1 * y2 - x2 * y1
+        dx = x2 - x1
+        dy = y2 - y1
+        p += (dx * dx + dy * dy) ** 0.5
+    return 0.5 * abs(a), p
+
+
+# Serial on purpose: jobs run on several threads and Numba's default
+# workqueue threading layer aborts if two threads enter a parallel kernel;
+# per-sheet contour counts are small enough that one core is plenty
+@numba.njit(cache=True, fastmath=True)
+def _compactness_batch(points: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Compactness of each contour stored as points[offsets[k]:offsets[k + 1]]."""
+    n = offsets.shape[0] - 1
+    out = np.zeros(n)
+    for k in range(n):
+        area, perimeter = _shoelace_and_perim(points[offsets[k]:offsets[k + 1]])
+        if perimeter > 0:
+            out[k] = (4 * np.pi * area) / (perimeter * perimeter)
+    return out
 
 
 def calculate_compactness(contour: np.ndarray) -> float:
@@ -15,8 +46,8 @@ def calculate_compactness(contour: np.ndarray) -> float:
 
     Formula: 4π * area / perimeter²
     """
-    area = cv2.contourArea(contour)
-    perimeter = cv2.arcLength(contour, True)
+    pts = np.asarray(contour, dtype=np.float64).reshape(-1, 2)
+    area, perimeter = _shoelace_and_perim(pts)
 
     if perimeter == 0:
         return 0.0
@@ -25,14 +56,49 @@ def calculate_compactness(contour: np.ndarray) -> float:
     return compactness
 
 
-def needs_review(polygon_data: Dict[str, Any], area_sqft: float, all_areas: List[float]) -> Dict[str, Any]:
+def calculate_compactness_batch(contours: List[np.ndarray]) -> np.ndarray:
+    """
+    Calculate compactness for all contours of a sheet in one compiled call
+
+    Args:
+        contours: OpenCV contours (any shape reshapeable to (N, 2))
+
+    Returns:
+        Compactness per contour, in input order
+    """
+
+    if not contours:
+        return np.empty(0, dtype=np.float64)
+
+    pts_list = [np.asarray(c, dtype=np.float64).reshape(-1, 2) for c in contours]
+
+    offsets = np.zeros(len(pts_list) + 1, dtype=np.int64)
+    np.cumsum([len(pts) for pts in pts_list], out=offsets[1:])
+
+    return _compactness_batch(np.concatenate(pts_list), offsets)
+
+
+def needs_review(
+    polygon_data: Dict[str, Any],
+    area_sqft: float,
+    area_mean: float,
+    area_std: float,
+    n_areas: int,
+    compactness: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Determine if a polygon needs manual review
 
+    The area statistics are computed once per sheet by the caller, e.g.
+    areas = np.asarray(all_areas, dtype=np.float64); areas.mean(); areas.std()
+
     Args:
         polygon_data: Polygon data dictionary from polygon_extractor
         area_sqft: Calculated area in square feet
-        all_areas: List of all polygon areas for outlier detection
+        area_mean: Mean of all polygon areas (for outlier detection)
+        area_std: Standard deviation of all polygon areas
+        n_areas: Number of polygon areas the statistics were computed from
+        compactness: Precomputed compactness (computed from the contour if omitted)
 
     Returns:
         Dictionary with review_needed flag and reasons
@@ -49,7 +115,8 @@ def needs_review(polygon_data: Dict[str, Any], area_sqft: float, all_areas: List
         review_flags.append("Very large area")
 
     # 3. Check for irregular shapes using compactness
-    compactness = calculate_compactness(polygon_data['contour'])
+    if compactness is None:
+        compactness = calculate_compactness(polygon_data['contour'])
     if compactness < 0.15:  # Very irregular
         review_flags.append("Irregular shape")
 
@@ -58,12 +125,9 @@ def needs_review(polygon_data: Dict[str, Any], area_sqft: float, all_areas: List
         review_flags.append("Complex polygon")
 
     # 5. Statistical outlier detection (if enough data)
-    if len(all_areas) > 10:
-        mean_area = np.mean(all_areas)
-        std_area = np.std(all_areas)
-
+    if n_areas > 10:
         # Flag if area is more than 3 standard deviations from mean
-        if abs(area_sqft - mean_area) > 3 * std_area:
+        if abs(area_sqft - area_mean) > 3 * area_std:
             review_flags.append("Statistical outlier")
 
     return {
@@ -73,48 +137,73 @@ def needs_review(polygon_data: Dict[str, Any], area_sqft: float, all_areas: List
     }
 
 
-def calculate_confidence(polygon_data: Dict[str, Any], classification_metrics: Dict[str, float]) -> float:
+def calculate_confidence(
+    polygon_data: Dict[str, Any],
+    classification_metrics: Dict[str, float],
+    compactness: Optional[float] = None
+) -> float:
     """
     Calculate classification confidence score (0.0 to 1.0)
 
+    Pass the compactness already computed for needs_review to avoid
+    measuring the contour twice.
+
     Args:
         polygon_data: Polygon data
         classification_metrics: Metrics from the classifier (intensity, edge_density, etc.)
+        compactness: Precomputed compactness (computed from the contour if omitted)
 
     Returns:
         Confidence score between 0.0 and 1.0
     """
 
-    confidence_factors = []
+    if compactness is None:
+        compactness = calculate_compactness(polygon_data['contour'])
+
+    return calculate_confidence_batch([polygon_data], compactness=[compactness])[0]
+
+
+def calculate_confidence_batch(
+    polygons: List[Dict[str, Any]],
+    compactness: Optional[Sequence[float]] = None
+) -> List[float]:
+    """
+    Calculate classification confidence scores for many polygons at once
+
+    Each factor is bucketed with array operations and the three factors
+    are averaged per polygon.
+
+    Args:
+        polygons: List of polygon data dictionaries
+        compactness: Precomputed compactness per polygon (computed if omitted)
+
+    Returns:
+        Confidence scores between 0.0 and 1.0, in input order
+    """
+
+    if not polygons:
+        return []
+
+    if compactness is None:
+        compactness = calculate_compactness_batch([p['contour'] for p in polygons])
+
+    compactness = np.asarray(compactness, dtype=np.float64)
+    vertex_count = np.fromiter((p['vertex_count'] for p in polygons), dtype=np.float64, count=len(polygons))
+    pixel_area = np.fromiter((p['pixel_area'] for p in polygons), dtype=np.float64, count=len(polygons))
 
     # Factor 1: Compactness (irregular shapes = lower confidence)
-    compactness = calculate_compactness(polygon_data['contour'])
-    if compactness > 0.5:
-        confidence_factors.append(0.9)
-    elif compactness > 0.3:
-        confidence_factors.append(0.7)
-    else:
-        confidence_factors.append(0.5)
+    compactness_score = np.where(compactness > 0.5, 0.9, np.where(compactness > 0.3, 0.7, 0.5))
 
     # Factor 2: Vertex count (simpler = higher confidence)
-    vertex_count = polygon_data['vertex_count']
-    if vertex_count < 10:
-        confidence_factors.append(0.9)
-    elif vertex_count < 30:
-        confidence_factors.append(0.75)
-    else:
-        confidence_factors.append(0.6)
+    vertex_score = np.where(vertex_count < 10, 0.9, np.where(vertex_count < 30, 0.75, 0.6))
 
     # Factor 3: Area size (mid-range = higher confidence)
-    pixel_area = polygon_data['pixel_area']
-    if 5000 < pixel_area < 500000:
-        confidence_factors.append(0.9)
-    elif 1000 < pixel_area < 1000000:
-        confidence_factors.append(0.75)
-    else:
-        confidence_factors.append(0.6)
+    area_score = np.where(
+        (pixel_area > 5000) & (pixel_area < 500000), 0.9,
+        np.where((pixel_area > 1000) & (pixel_area < 1000000), 0.75, 0.6)
+    )
 
     # Average all factors
-    avg_confidence = np.mean(confidence_factors) if confidence_factors else 0.5
+    confidence = np.round((compactness_score + vertex_score + area_score) / 3, 2)
 
-    return round(avg_confidence, 2)
+    return confidence.tolist()
@@ -12,13 +12,16 @@ Future: Add ML model + OCR label anchoring
 
 import cv2
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 
 def classify_polygon(img_path: str, contour: np.ndarray) -> str:
     """
     Classify a polygon based on its interior pattern
 
+    Decodes the image on every call; when classifying several polygons
+    from the same sheet use classify_polygons_batch instead.
+
     Args:
         img_path: Path to the source image
         contour: OpenCV contour representing the polygon
@@ -27,28 +30,63 @@ def classify_polygon(img_path: str, contour: np.ndarray) -> str:
         Surface type: "building", "concrete", "asphalt", or "pervious"
     """
 
-    # Load image
-    img = cv2.imread(img_path)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gray = cv2.imread(img_path, cv2.IMREAD_GRAYSCALE)
 
-    # Create mask for polygon region
-    mask = np.zeros(gray.shape, dtype=np.uint8)
-    cv2.drawContours(mask, [contour], -1, 255, -1)
+    return classify_polygons_batch(gray, [contour])[0]
 
-    # Extract region of interest
-    roi = cv2.bitwise_and(gray, gray, mask=mask)
 
-    # Calculate intensity statistics
-    pixels = roi[mask == 255]
-    if len(pixels) == 0:
-        return "pervious"  # default
+def classify_polygons_batch(gray: np.ndarray, contours: List[np.ndarray]) -> List[str]:
+    """
+    Classify all polygons of a sheet against one decoded grayscale image
 
-    mean_intensity = np.mean(pixels)
-    std_intensity = np.std(pixels)
+    The image is decoded once per sheet; each polygon is then analyzed
+    only within its bounding rectangle, so work scales with the polygon's
+    size rather than the sheet's.
 
-    # Analyze texture patterns using edge density
-    edges = cv2.Canny(roi, 50, 150)
-    edge_density = np.sum(edges[mask == 255]) / len(pixels) if len(pixels) > 0 else 0
+    Args:
+        gray: Grayscale sheet image (e.g. cv2.imread(path, cv2.IMREAD_GRAYSCALE))
+        contours: OpenCV contours representing the polygons
+
+    Returns:
+        Surface type for each contour, in input order
+    """
+
+    surface_types = []
+    for contour in contours:
+        # Crop to the polygon's bounding rectangle (clamped to the image)
+        x, y, w, h = cv2.boundingRect(contour)
+        x0, y0 = max(x, 0), max(y, 0)
+        gray_roi = gray[y0:y + h, x0:x + w]
+
+        # Create mask for polygon region in ROI coordinates
+        mask = np.zeros(gray_roi.shape, dtype=np.uint8)
+        cv2.drawContours(mask, [contour], -1, 255, -1, offset=(-x0, -y0))
+        inside = mask == 255
+
+        # Calculate intensity statistics
+        pixels = gray_roi[inside]
+        if len(pixels) == 0:
+            surface_types.append("pervious")  # default
+            continue
+
+        mean_intensity = np.mean(pixels)
+        std_intensity = np.std(pixels)
+
+        # Analyze texture patterns using edge density; only the "building"
+        # rule uses it, and that rule requires 80 < mean_intensity < 180
+        if 80 < mean_intensity < 180:
+            edges = cv2.Canny(gray_roi, 50, 150)
+            edge_density = np.sum(edges[inside]) / len(pixels)
+        else:
+            edge_density = 0.0
+
+        surface_types.append(_classify_from_stats(mean_intensity, std_intensity, edge_density))
+
+    return surface_types
+
+
+def _classify_from_stats(mean_intensity: float, std_intensity: float, edge_density: float) -> str:
+    """Apply the classification heuristics to a polygon's pixel statistics."""
 
     # Classification heuristics
     # These thresholds are derived from typical plan hatch patterns
@@ -104,14 +142,11 @@ def analyze_hatch_pattern(roi: np.ndarray) -> Dict[str, Any]:
             "line_count": 0
         }
 
-    # Calculate line angles
-    angles = []
-    for line in lines:
-        x1, y1, x2, y2 = line[0]
-        angle = np.degrees(np.arctan2(y2 - y1, x2 - x1))
-        angles.append(angle)
-
-    angles = np.array(angles)
+    # Calculate line angles for all segments at once
+    segments = lines.reshape(-1, 4)
+    dx = segments[:, 2] - segments[:, 0]
+    dy = segments[:, 3] - segments[:, 1]
+    angles = np.degrees(np.arctan2(dy, dx))
 
     return {
         "has_hatch": True,
@@ -8,10 +8,14 @@ Formats:
 """
 
 import csv
-import json
+import orjson
 from typing import List, Dict, Any
 
 
+# Surface types counted as impervious cover
+_IMPERVIOUS_TYPES = frozenset({'concrete', 'asphalt', 'building'})
+
+
 def export_to_csv(polygons: List[Dict[str, Any]], summary: Dict[str, Any], output_path: str) -> None:
     """
     Export polygon results to CSV
@@ -22,7 +26,7 @@ def export_to_csv(polygons: List[Dict[str, Any]], summary: Dict[str, Any], outpu
         output_path: Path to save CSV file
     """
 
-    with open(output_path, 'w', newline='') as csvfile:
+    with open(output_path, 'w', newline='', buffering=1 << 20) as csvfile:
         writer = csv.writer(csvfile)
 
         # Header
@@ -48,15 +52,16 @@ def export_to_csv(polygons: List[Dict[str, Any]], summary: Dict[str, Any], outpu
         writer.writerow(['Detailed Polygon Data'])
         writer.writerow(['Polygon ID', 'Sheet', 'Surface Type', 'Area (sqft)', 'Perimeter Type'])
 
-        for poly in polygons:
-            perimeter_type = 'Impervious' if poly['type'] in ['concrete', 'asphalt', 'building'] else 'Pervious'
-            writer.writerow([
+        writer.writerows(
+            (
                 poly['id'],
                 poly['sheet'],
                 poly['type'],
                 poly['area_sqft'],
-                perimeter_type
-            ])
+                'Impervious' if poly['type'] in _IMPERVIOUS_TYPES else 'Pervious'
+            )
+            for poly in polygons
+        )
 
     print(f"  ✓ CSV exported to: {output_path}")
 
@@ -79,7 +84,7 @@ def export_to_geojson(polygons: List[Dict[str, Any]], output_path: str) -> None:
 
         # Support both old 'coordinates' and new 'coords_pdf' field names
         coords = poly.get('coords_pdf') or poly.get('coordinates', [])
-        coordinates = [[coord for coord in coords]]
+        coordinates = [coords]
 
         feature = {
             "type": "Feature",
@@ -92,7 +97,7 @@ def export_to_geojson(polygons: List[Dict[str, Any]], output_path: str) -> None:
                 "sheet": poly['sheet'],
                 "surface_type": poly['type'],
                 "area_sqft": poly['area_sqft'],
-                "perimeter_type": "Impervious" if poly['type'] in ['concrete', 'asphalt', 'building'] else "Pervious"
+                "perimeter_type": "Impervious" if poly['type'] in _IMPERVIOUS_TYPES else "Pervious"
             }
         }
 
@@ -103,8 +108,9 @@ def export_to_geojson(polygons: List[Dict[str, Any]], output_path: str) -> None:
         "features": features
     }
 
-    with open(output_path, 'w') as f:
-        json.dump(geojson, f, indent=2)
+    # Compact output: GeoJSON is consumed programmatically, not read by hand
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(geojson, option=orjson.OPT_SERIALIZE_NUMPY))
 
     print(f"  ✓ GeoJSON exported to: {output_path}")
 
@@ -139,7 +145,7 @@ def export_to_toc_format(polygons: List[Dict[str, Any]], summary: Dict[str, Any]
         "polygons": polygons
     }
 
-    with open(output_path, 'w') as f:
-        json.dump(toc_data, f, indent=2)
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(toc_data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2))
 
     print(f"  ✓ TOC format exported to: {output_path}")
@@ -3,10 +3,9 @@ PDF Reader Module
 Converts PDF plan sheets to high-resolution images for processing
 """
 
-from pdf2image import convert_from_path
+import fitz  # PyMuPDF
 import uuid
 import os
-import platform
 from typing import List
 
 
@@ -14,6 +13,8 @@ def pdf_to_images(pdf_path: str, dpi: int = 200) -> List[str]:
     """
     Convert a PDF file to a list of image paths
 
+    Pages are rasterized in-process with MuPDF and written straight to PNG.
+
     Args:
         pdf_path: Path to the PDF file
         dpi: Resolution for image conversion (default 300 for engineering plans)
@@ -26,24 +27,24 @@ def pdf_to_images(pdf_path: str, dpi: int = 200) -> List[str]:
     print(f"Resolution: {dpi} DPI")
 
     try:
-        # Convert PDF pages to images
-        # On Windows, pdf2image often needs the explicit Poppler path
-        system = platform.system().lower()
-        if system == "windows":
-            poppler_path = r"C:\\poppler\\poppler-25.12.0\\Library\\bin"
-            pages = convert_from_path(pdf_path, dpi=dpi, poppler_path=poppler_path)
-        else:
-            pages = convert_from_path(pdf_path, dpi=dpi)
-        print(f"Successfully converted {len(pages)} pages")
-
-        image_paths = []
-
-        # Save each page as a PNG
-        for i, page in enumerate(pages):
-            filename = f"temp_uploads/sheet_{uuid.uuid4()}_{i}.png"
-            page.save(filename, "PNG")
-            image_paths.append(filename)
-            print(f"  Saved sheet {i+1}: {filename}")
+        doc = fitz.open(pdf_path)
+        try:
+            zoom = dpi / 72  # 72 is default PDF DPI
+            mat = fitz.Matrix(zoom, zoom)
+
+            image_paths = []
+
+            # Render and save each page as a PNG
+            for i, page in enumerate(doc):
+                pix = page.get_pixmap(matrix=mat, alpha=False)
+                filename = f"temp_uploads/sheet_{uuid.uuid4()}_{i}.png"
+                pix.save(filename)
+                image_paths.append(filename)
+                print(f"  Saved sheet {i+1}: {filename}")
+
+            print(f"Successfully converted {len(image_paths)} pages")
+        finally:
+            doc.close()
 
         return image_paths
 
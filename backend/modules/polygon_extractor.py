@@ -9,7 +9,23 @@ import numpy as np
 from typing import List, Dict, Any, Tuple
 
 
-def extract_polygons(img_path: str, min_area: int = 10000, max_area_ratio: float = 0.35) -> List[Dict[str, Any]]:
+# Structuring elements for the half-resolution segmentation pass (see extract_polygons)
+# CLOSE with n iterations is dilate^n then erode^n, so one pass with a
+# rectangle of size n*(k-1)+1 covers the same reach; rectangular kernels
+# take OpenCV's fast separable path (was 25x25 ellipse x3 at full scale)
+_KERNEL_CLOSE = cv2.getStructuringElement(cv2.MORPH_RECT, (37, 37))
+# Small noise removal (was 5x5 ellipse x2 at full scale)
+_KERNEL_OPEN = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+# Edge dilation to connect nearby lines
+_KERNEL_DILATE = np.ones((3, 3), np.uint8)
+
+
+def extract_polygons(
+    img_path: str,
+    min_area: int = 10000,
+    max_area_ratio: float = 0.35,
+    target_count: int = 100
+) -> List[Dict[str, Any]]:
     """
     Extract meaningful polygons from a civil engineering plan sheet.
     
@@ -22,6 +38,7 @@ def extract_polygons(img_path: str, min_area: int = 10000, max_area_ratio: float
         img_path: Path to the image file
         min_area: Minimum polygon area in pixels (filters noise)
         max_area_ratio: Maximum polygon area as ratio of image area (filters borders/frames)
+        target_count: Skip the edge-based strategy once this many polygons are found
 
     Returns:
         List of polygon dictionaries containing contour data and metadata
@@ -48,43 +65,59 @@ def extract_polygons(img_path: str, min_area: int = 10000, max_area_ratio: float
     # Strategy 1: Detect filled/shaded regions by grayscale thresholding
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     
+    # Segment at half resolution (~4x fewer pixels through threshold and
+    # morphology); contours are scaled back to full resolution below
+    gray_small = cv2.pyrDown(gray)
+    
     # Find regions that are darker than the white background (filled areas, hatching)
     # Use adaptive thresholding to handle varying lighting/scan quality
+    # (block size 25 at half scale ~ 51 at full scale)
     binary = cv2.adaptiveThreshold(
-        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 51, 10
+        gray_small, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 25, 10
     )
     
     # Heavy morphological closing to merge hatching patterns into solid regions
     # This is key for civil plans where areas are indicated by line patterns
-    kernel_close = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (25, 25))
-    closed = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel_close, iterations=3)
+    closed = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, _KERNEL_CLOSE)
     
     # Remove small noise
-    kernel_open = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-    cleaned = cv2.morphologyEx(closed, cv2.MORPH_OPEN, kernel_open, iterations=2)
+    cleaned = cv2.morphologyEx(closed, cv2.MORPH_OPEN, _KERNEL_OPEN)
     
     # Find contours - use RETR_EXTERNAL to get only outer boundaries
-    contours, _ = cv2.findContours(cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # TC89_L1 already yields a sparse polyline, so most contours skip approxPolyDP
+    contours, _ = cv2.findContours(cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_TC89_L1)
     
     print(f"  Found {len(contours)} candidate regions after morphological processing")
     
-    for idx, contour in enumerate(contours):
+    for idx, small_contour in enumerate(contours):
+        # Scale back to full-resolution pixel coordinates
+        contour = small_contour * 2
         polygon = _process_contour(contour, idx, min_area, max_area, max_width, max_height, "filled")
         if polygon:
             all_polygons.append(polygon)
     
+    # Strategy 1 already found enough regions; the edge pass is the slowest step
+    if len(all_polygons) >= target_count:
+        print(f"  Extracted {len(all_polygons)} valid polygons")
+        return all_polygons
+    
     # Strategy 2: Detect rectangular structures (buildings) using edge detection
-    edges = cv2.Canny(gray, 50, 150)
+    # Reuse the half-resolution image; buildings are large enough to survive it
+    edges = cv2.Canny(gray_small, 50, 150)
     
-    # Dilate edges to connect nearby lines
-    kernel_dilate = np.ones((3, 3), np.uint8)
-    dilated = cv2.dilate(edges, kernel_dilate, iterations=2)
+    # Dilate edges to connect nearby lines (one pass at half scale ~ two at full scale)
+    dilated = cv2.dilate(edges, _KERNEL_DILATE, iterations=1)
     
     # Find contours from edges
-    edge_contours, hierarchy = cv2.findContours(dilated, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    edge_contours, hierarchy = cv2.findContours(dilated, cv2.RETR_TREE, cv2.CHAIN_APPROX_TC89_L1)
+    
+    # Bounding boxes of accepted polygons as an (N, 4) [x1, y1, x2, y2] array for dedup
+    bboxes = np.array([_bbox_corners(p) for p in all_polygons], dtype=np.int64).reshape(-1, 4)
     
     # Filter for rectangular shapes (likely buildings)
-    for idx, contour in enumerate(edge_contours):
+    for idx, small_contour in enumerate(edge_contours):
+        # Scale back to full-resolution pixel coordinates
+        contour = small_contour * 2
         area = cv2.contourArea(contour)
         if area < min_area or area > max_area:
             continue
@@ -96,9 +129,10 @@ def extract_polygons(img_path: str, min_area: int = 10000, max_area_ratio: float
             rectangularity = area / rect_area
             # Only keep shapes that are fairly rectangular (> 70% fill of bounding rect)
             if rectangularity > 0.7:
-                polygon = _process_contour(contour, len(all_polygons) + idx, min_area, max_area, max_width, max_height, "structure")
-                if polygon and not _is_duplicate(polygon, all_polygons):
+                polygon = _process_contour(contour, len(all_polygons) + idx, min_area, max_area, max_width, max_height, "structure", area)
+                if polygon and not _is_duplicate(polygon, bboxes):
                     all_polygons.append(polygon)
+                    bboxes = np.vstack((bboxes, _bbox_corners(polygon)))
     
     print(f"  Extracted {len(all_polygons)} valid polygons")
     
@@ -112,11 +146,19 @@ def _process_contour(
     max_area: float,
     max_width: float,
     max_height: float,
-    detection_method: str
+    detection_method: str,
+    area: float | None = None
 ) -> Dict[str, Any] | None:
-    """Process a single contour and return polygon data if valid."""
+    """
+    Process a single contour and return polygon data if valid.
     
-    area = cv2.contourArea(contour)
+    Cheap checks (area, bounding box, aspect ratio) run first so rejected
+    contours never reach arcLength/approxPolyDP. Pass area if the caller
+    already computed it.
+    """
+    
+    if area is None:
+        area = cv2.contourArea(contour)
     
     # Filter by area
     if area < min_area or area > max_area:
@@ -132,9 +174,13 @@ def _process_contour(
     if aspect_ratio > 15:  # Very elongated = probably a line
         return None
     
-    # Approximate polygon to reduce vertices
-    epsilon = 0.005 * cv2.arcLength(contour, True)
-    approx = cv2.approxPolyDP(contour, epsilon, True)
+    # Approximate polygon to reduce vertices (contours from TC89_L1 are
+    # usually sparse enough already)
+    if len(contour) > 50:
+        epsilon = 0.005 * cv2.arcLength(contour, True)
+        approx = cv2.approxPolyDP(contour, epsilon, True)
+    else:
+        approx = contour
     
     # Extract polygon coordinates
     coordinates = []
@@ -153,30 +199,32 @@ def _process_contour(
     }
 
 
-def _is_duplicate(new_polygon: Dict, existing_polygons: List[Dict], iou_threshold: float = 0.5) -> bool:
-    """Check if a polygon significantly overlaps with any existing polygon."""
-    
-    new_bbox = new_polygon["bbox"]
-    new_x1, new_y1 = new_bbox["x"], new_bbox["y"]
-    new_x2, new_y2 = new_x1 + new_bbox["w"], new_y1 + new_bbox["h"]
-    
-    for existing in existing_polygons:
-        ex_bbox = existing["bbox"]
-        ex_x1, ex_y1 = ex_bbox["x"], ex_bbox["y"]
-        ex_x2, ex_y2 = ex_x1 + ex_bbox["w"], ex_y1 + ex_bbox["h"]
-        
-        # Calculate intersection
-        inter_x1 = max(new_x1, ex_x1)
-        inter_y1 = max(new_y1, ex_y1)
-        inter_x2 = min(new_x2, ex_x2)
-        inter_y2 = min(new_y2, ex_y2)
-        
-        if inter_x2 > inter_x1 and inter_y2 > inter_y1:
-            inter_area = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
-            new_area = new_bbox["w"] * new_bbox["h"]
-            
-            # If intersection is > threshold of new polygon's area, it's a duplicate
-            if inter_area / new_area > iou_threshold:
-                return True
+def _bbox_corners(polygon: Dict) -> Tuple[int, int, int, int]:
+    """Return a polygon's bounding box as (x1, y1, x2, y2)."""
+    
+    bbox = polygon["bbox"]
+    return bbox["x"], bbox["y"], bbox["x"] + bbox["w"], bbox["y"] + bbox["h"]
+
+
+def _is_duplicate(new_polygon: Dict, bboxes: np.ndarray, iou_threshold: float = 0.5) -> bool:
+    """
+    Check if a polygon significantly overlaps with any existing polygon.
+    
+    bboxes holds the existing polygons' bounding boxes as an (N, 4)
+    [x1, y1, x2, y2] array, so all overlaps are computed in one pass.
+    """
+    
+    if len(bboxes) == 0:
+        return False
+    
+    new_x1, new_y1, new_x2, new_y2 = _bbox_corners(new_polygon)
+    
+    # Calculate intersections with every existing box
+    inter_w = np.minimum(bboxes[:, 2], new_x2) - np.maximum(bboxes[:, 0], new_x1)
+    inter_h = np.minimum(bboxes[:, 3], new_y2) - np.maximum(bboxes[:, 1], new_y1)
+    inter_area = np.clip(inter_w, 0, None) * np.clip(inter_h, 0, None)
+    
+    new_area = (new_x2 - new_x1) * (new_y2 - new_y1)
     
-    return False
+    # If intersection is > threshold of new polygon's area, it's a duplicate
+    return bool((inter_area / new_area > iou_threshold).any())
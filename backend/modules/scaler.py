@@ -7,10 +7,14 @@ Target: Extract pixels_per_foot ratio for accurate area calculations
 """
 
 import os
+import hashlib
 import cv2
 import numpy as np
 import pytesseract
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple
 
 
@@ -19,6 +23,17 @@ TESSERACT_WIN_PATH = r"C:\\Program Files\\Tesseract-OCR\\tesseract.exe"
 if os.path.exists(TESSERACT_WIN_PATH):
     pytesseract.pytesseract.tesseract_cmd = TESSERACT_WIN_PATH
 
+# Scale text: "feet 0 20 40" (OCR output is lowercased before matching)
+_OCR_FEET_RE = re.compile(r'feet.*?0.*?(\d+).*?(\d+)')
+
+# Detected scale per image content hash, so repeated extraction passes over the
+# same sheet don't rerun OCR even when it was written to a new temp path.
+# Least recently used entries are evicted beyond _SCALE_CACHE_SIZE
+_SCALE_CACHE: "OrderedDict[bytes, float]" = OrderedDict()
+_SCALE_CACHE_SIZE = 64
+# Request threads share the cache; lookups reorder it and inserts evict
+_SCALE_CACHE_LOCK = threading.Lock()
+
 
 def detect_scale(img_path: str) -> float:
     """
@@ -39,49 +54,112 @@ def detect_scale(img_path: str) -> float:
 
     print("  Detecting scale bar...")
 
-    img = cv2.imread(img_path)
+    # Read the file once: its bytes are both the cache key and the decode input
+    with open(img_path, 'rb') as f:
+        data = f.read()
+    cache_key = hashlib.blake2b(data, digest_size=16).digest()
+    with _SCALE_CACHE_LOCK:
+        cached_ratio = _SCALE_CACHE.get(cache_key)
+        if cached_ratio is not None:
+            _SCALE_CACHE.move_to_end(cache_key)
+    if cached_ratio is not None:
+        print(f"  ✓ Using cached scale: {cached_ratio:.2f} pixels/foot")
+        return cached_ratio
+
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
-    # Strategy 1: OCR-based scale detection (used only as a secondary hint)
-    ocr_scale_ratio: Optional[float] = None
+    # Run both strategies concurrently: Tesseract runs as a subprocess and
+    # OpenCV releases the GIL, so the fast graphical check isn't held up by OCR
+    executor = ThreadPoolExecutor(max_workers=2)
     try:
-        # Focus on bottom 20% of image where scale bars are typically located
-        h, w = gray.shape
-        roi = gray[int(h * 0.8):, :]
-
-        # OCR with pytesseract
-        ocr_text = pytesseract.image_to_string(roi, config='--psm 6')
-        print(f"  OCR detected: {ocr_text[:100]}")
-
-        # Parse scale text
-        ocr_scale_ratio = parse_scale_text(ocr_text)
-
-        if ocr_scale_ratio is not None:
-            print(f"  ✓ Scale hinted from OCR: {ocr_scale_ratio:.2f} pixels/foot")
+        # Strategy 1: OCR-based scale detection (used only as a secondary hint).
+        # The worker only runs Tesseract; its result is parsed and logged below
+        # if it's actually needed, so an abandoned OCR run stays silent
+        ocr_future = executor.submit(_ocr_scale_region, gray)
 
-    except Exception as e:
-        print(f"  OCR scale detection failed: {str(e)}")
+        # Strategy 2: Graphical scale bar detection
+        print("  Attempting graphical scale detection...")
+        graphical_future = executor.submit(detect_scale_bar_graphically, gray)
+        scale_ratio = graphical_future.result()
 
-    # Strategy 2: Graphical scale bar detection
-    print("  Attempting graphical scale detection...")
-    scale_ratio = detect_scale_bar_graphically(gray)
+        if scale_ratio is not None:
+            # The OCR hint is only a fallback, so don't wait for Tesseract
+            print(f"  ✓ Scale detected graphically: {scale_ratio:.2f} pixels/foot")
+            return _cache_scale(cache_key, scale_ratio)
 
-    if scale_ratio is not None:
-        print(f"  ✓ Scale detected graphically: {scale_ratio:.2f} pixels/foot")
-        return scale_ratio
+        ocr_scale_ratio = _scale_from_ocr(ocr_future)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
     # If graphical detection fails but OCR returned something large enough,
     # use it as a fallback. Very small values (like the 15 px/ft placeholder)
     # are rejected because they produce wildly incorrect areas.
     if ocr_scale_ratio is not None and ocr_scale_ratio > 50:
         print(f"  ⚠ Using OCR-only scale estimate: {ocr_scale_ratio:.2f} pixels/foot")
-        return ocr_scale_ratio
+        return _cache_scale(cache_key, ocr_scale_ratio)
 
     # Fallback: Use typical architectural scale (1" = 20')
     print("  ⚠ Scale bar not found, using fallback: 1\" = 20' at 300 DPI")
     # At 300 DPI: 1 inch = 300 pixels, 20 feet → 300 pixels
     fallback_ratio = 300 / 20  # 15 pixels/foot
-    return fallback_ratio
+    return _cache_scale(cache_key, fallback_ratio)
+
+
+def _cache_scale(cache_key: bytes, scale_ratio: float) -> float:
+    """Store a detected scale in the bounded LRU cache and return it."""
+    with _SCALE_CACHE_LOCK:
+        _SCALE_CACHE[cache_key] = scale_ratio
+        if len(_SCALE_CACHE) > _SCALE_CACHE_SIZE:
+            _SCALE_CACHE.popitem(last=False)
+    return scale_ratio
+
+
+def _ocr_scale_region(gray: np.ndarray) -> str:
+    """
+    OCR the bottom of the sheet for scale text (runs on a worker thread, no logging)
+
+    Args:
+        gray: Grayscale image
+
+    Returns:
+        Raw OCR text
+    """
+
+    # Focus on bottom 20% of image where scale bars are typically located
+    h, w = gray.shape
+    roi = gray[int(h * 0.8):, :]
+
+    # OCR with pytesseract
+    return pytesseract.image_to_string(roi, config='--psm 6')
+
+
+def _scale_from_ocr(ocr_future) -> Optional[float]:
+    """
+    Wait for the OCR worker and parse its text into a scale hint
+
+    Args:
+        ocr_future: Future from _ocr_scale_region
+
+    Returns:
+        pixels_per_foot hint if found, else None
+    """
+
+    try:
+        ocr_text = ocr_future.result()
+    except Exception as e:
+        print(f"  OCR scale detection failed: {str(e)}")
+        return None
+
+    print(f"  OCR detected: {ocr_text[:100]}")
+
+    # Parse scale text
+    ocr_scale_ratio = parse_scale_text(ocr_text)
+
+    if ocr_scale_ratio is not None:
+        print(f"  ✓ Scale hinted from OCR: {ocr_scale_ratio:.2f} pixels/foot")
+
+    return ocr_scale_ratio
 
 
 def parse_scale_text(text: str) -> Optional[float]:
@@ -104,7 +182,7 @@ def parse_scale_text(text: str) -> Optional[float]:
     text = text.replace('\n', ' ').lower()
 
     # Pattern 1: "feet 0 20 40" or "0 20 40"
-    pattern1 = re.search(r'feet.*?0.*?(\d+).*?(\d+)', text)
+    pattern1 = _OCR_FEET_RE.search(text)
     if pattern1:
         # Assumes first number after 0 is the scale unit (e.g., 20 feet)
         scale_feet = int(pattern1.group(1))
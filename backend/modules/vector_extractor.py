@@ -4,15 +4,29 @@ Extracts actual CAD geometry directly from PDF vector data.
 This is the correct approach for engineering plans exported from Civil3D/AutoCAD.
 """
 
+import os
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import fitz  # PyMuPDF
-from shapely.geometry import Polygon, LineString, MultiLineString, box
-from shapely.ops import polygonize, unary_union
+import shapely
+from shapely.geometry import Polygon, MultiLineString, box
+from shapely.ops import polygonize
+from shapely.strtree import STRtree
 from shapely.validation import make_valid
 import numpy as np
+import numba
 from typing import List, Dict, Any, Tuple, Optional
 from collections import defaultdict
 
 
+# Scale annotation patterns in civil plans
+# "1" = 20'" or "SCALE: 1"=20'"
+_SCALE_INCH_RE = re.compile(r'1["\']?\s*=\s*(\d+)["\']?')
+# Graphic scale bar labels, e.g. "0 40 80 Feet"
+_SCALE_BAR_RE = re.compile(r'(\d+)\s+(\d+)\s+(\d+)?\s*(?:FEET|FT|\')', re.IGNORECASE)
+
+
 def extract_vectors_from_pdf(pdf_path: str) -> List[Dict[str, Any]]:
     """
     Extract vector geometry from all pages of a PDF.
@@ -24,19 +38,55 @@ def extract_vectors_from_pdf(pdf_path: str) -> List[Dict[str, Any]]:
     """
     
     doc = fitz.open(pdf_path)
-    all_sheets = []
+    page_count = len(doc)
+    doc.close()
     
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        print(f"  Extracting vectors from page {page_num + 1}...")
-        
-        sheet_data = extract_page_vectors(page, page_num + 1)
-        all_sheets.append(sheet_data)
+    if page_count == 0:
+        return []
+    
+    # Pages are independent; each worker opens its own document. Spawn rather
+    # than fork, since callers may be threads of a multithreaded server
+    with ProcessPoolExecutor(
+        max_workers=min(os.cpu_count() or 1, page_count),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        futures = [executor.submit(_extract_one_page, pdf_path, page_num) for page_num in range(page_count)]
+        all_sheets = [future.result() for future in futures]
     
-    doc.close()
     return all_sheets
 
 
+def _extract_one_page(pdf_path: str, page_num: int) -> Dict[str, Any]:
+    """
+    Extract vectors from a single page in a worker process.
+    Opens its own document since fitz.Page objects can't be pickled.
+    """
+    
+    doc = fitz.open(pdf_path)
+    try:
+        print(f"  Extracting vectors from page {page_num + 1}...")
+        return extract_page_vectors(doc[page_num], page_num + 1)
+    finally:
+        doc.close()
+
+
+@numba.njit(cache=True)
+def _clean_and_close(pts: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Drop consecutive duplicate points from an (N, 2) path and return the
+    cleaned points with the squared distance between its first and last point.
+    """
+    out = np.empty_like(pts)
+    k = 0
+    for i in range(pts.shape[0]):
+        if k == 0 or pts[i, 0] != out[k - 1, 0] or pts[i, 1] != out[k - 1, 1]:
+            out[k] = pts[i]
+            k += 1
+    dx = out[0, 0] - out[k - 1, 0]
+    dy = out[0, 1] - out[k - 1, 1]
+    return out[:k], dx * dx + dy * dy
+
+
 def extract_page_vectors(page: fitz.Page, page_number: int) -> Dict[str, Any]:
     """
     Extract all vector paths from a single PDF page and convert to polygons.
@@ -46,12 +96,13 @@ def extract_page_vectors(page: fitz.Page, page_number: int) -> Dict[str, Any]:
     page_width = page_rect.width
     page_height = page_rect.height
     
-    # Get all drawings (vector paths) from the page
-    drawings = page.get_drawings()
+    # Get all drawings (vector paths) from the page; the C-level variant
+    # gives plain (x, y) tuples instead of Point/Rect objects
+    drawings = page.get_cdrawings()
     print(f"    Found {len(drawings)} drawing objects")
     
     # Collect all paths
-    all_lines = []
+    line_coords = []  # Flat x1, y1, x2, y2 per line segment
     all_rects = []
     filled_paths = []
     closed_paths = []  # Paths that form closed loops (even without fill)
@@ -63,21 +114,19 @@ def extract_page_vectors(page: fitz.Page, page_number: int) -> Dict[str, Any]:
         closePath = drawing.get("closePath", False)
         
         path_points = []
-        current_path_lines = []
         
         for item in items:
             cmd = item[0]
             
             if cmd == "l":  # Line segment
                 p1, p2 = item[1], item[2]
-                all_lines.append(((p1.x, p1.y), (p2.x, p2.y)))
-                current_path_lines.append(((p1.x, p1.y), (p2.x, p2.y)))
-                path_points.extend([(p1.x, p1.y), (p2.x, p2.y)])
+                line_coords.extend((p1[0], p1[1], p2[0], p2[1]))
+                path_points.extend([p1, p2])
                 
-            elif cmd == "re":  # Rectangle
-                rect = item[1]
+            elif cmd == "re":  # Rectangle as (x0, y0, x1, y1), not necessarily normalized
+                x0, y0, x1, y1 = item[1]
                 all_rects.append({
-                    "bounds": (rect.x0, rect.y0, rect.x1, rect.y1),
+                    "bounds": (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)),
                     "fill": fill_color,
                     "stroke": stroke_color
                 })
@@ -86,22 +135,19 @@ def extract_page_vectors(page: fitz.Page, page_number: int) -> Dict[str, Any]:
                 points = item[1:]
                 for i in range(len(points) - 1):
                     p1, p2 = points[i], points[i + 1]
-                    if hasattr(p1, 'x'):
-                        all_lines.append(((p1.x, p1.y), (p2.x, p2.y)))
-                        current_path_lines.append(((p1.x, p1.y), (p2.x, p2.y)))
-                        path_points.extend([(p1.x, p1.y), (p2.x, p2.y)])
+                    if len(p1) == 2 and len(p2) == 2:
+                        line_coords.extend((p1[0], p1[1], p2[0], p2[1]))
+                        path_points.extend([p1, p2])
                         
             elif cmd == "m":  # Move to
-                p = item[1]
-                path_points.append((p.x, p.y))
+                path_points.append(item[1])
                 
             elif cmd == "qu":  # Quadratic curve
                 points = item[1:]
                 for i in range(len(points) - 1):
                     p1, p2 = points[i], points[i + 1]
-                    if hasattr(p1, 'x'):
-                        all_lines.append(((p1.x, p1.y), (p2.x, p2.y)))
-                        current_path_lines.append(((p1.x, p1.y), (p2.x, p2.y)))
+                    if len(p1) == 2 and len(p2) == 2:
+                        line_coords.extend((p1[0], p1[1], p2[0], p2[1]))
         
         # If this path has a fill, it's likely a meaningful polygon
         if fill_color is not None and len(path_points) >= 3:
@@ -114,18 +160,17 @@ def extract_page_vectors(page: fitz.Page, page_number: int) -> Dict[str, Any]:
         # Check if this is a closed path (building outlines, etc.)
         # Even without fill, closed paths are important
         if len(path_points) >= 4:
-            # Check if first and last points are close (closed path)
-            first = path_points[0]
-            last = path_points[-1]
-            dist = ((first[0] - last[0])**2 + (first[1] - last[1])**2)**0.5
-            if dist < 5 or closePath:  # Within 5 PDF units = closed
+            # Remove duplicate consecutive points and check if first and
+            # last points are close (closed path) in one compiled pass
+            unique_points, gap_sq = _clean_and_close(np.asarray(path_points, dtype=np.float64))
+            if gap_sq < 25 or closePath:  # Within 5 PDF units = closed
                 closed_paths.append({
-                    "points": path_points,
+                    "points": unique_points,
                     "fill": fill_color,
                     "stroke": stroke_color
                 })
     
-    print(f"    Collected {len(all_lines)} lines, {len(all_rects)} rectangles, {len(filled_paths)} filled paths, {len(closed_paths)} closed paths")
+    print(f"    Collected {len(line_coords) // 4} lines, {len(all_rects)} rectangles, {len(filled_paths)} filled paths, {len(closed_paths)} closed paths")
     
     # Convert to Shapely geometries
     polygons = []
@@ -148,24 +193,24 @@ def extract_page_vectors(page: fitz.Page, page_number: int) -> Dict[str, Any]:
     # Process closed paths (building outlines, etc.)
     for cp in closed_paths:
         try:
-            if len(cp["points"]) >= 4:
-                # Remove duplicate consecutive points
-                unique_points = [cp["points"][0]]
-                for pt in cp["points"][1:]:
-                    if pt != unique_points[-1]:
-                        unique_points.append(pt)
-                
-                if len(unique_points) >= 3:
-                    poly = Polygon(unique_points)
-                    if not poly.is_valid:
+            # Consecutive duplicate points were already removed when collected
+            unique_points = cp["points"]
+            if len(unique_points) >= 3:
+                poly = Polygon(unique_points)
+                if not poly.is_valid:
+                    # make_valid is a full overlay; only worth it for small rings.
+                    # Larger ones get the cheaper buffer(0) repair or are skipped
+                    if len(unique_points) <= 50:
                         poly = make_valid(poly)
-                    if poly.is_valid and poly.area > 200:  # Slightly larger threshold
-                        polygons.append({
-                            "geometry": poly,
-                            "fill_color": cp["fill"],
-                            "stroke_color": cp["stroke"],
-                            "source": "closed_path"
-                        })
+                    else:
+                        poly = poly.buffer(0)
+                if poly.is_valid and poly.area > 200:  # Slightly larger threshold
+                    polygons.append({
+                        "geometry": poly,
+                        "fill_color": cp["fill"],
+                        "stroke_color": cp["stroke"],
+                        "source": "closed_path"
+                    })
         except Exception as e:
             pass
     
@@ -185,13 +230,18 @@ def extract_page_vectors(page: fitz.Page, page_number: int) -> Dict[str, Any]:
             pass
     
     # Try to form polygons from line segments using polygonize
-    if all_lines:
+    if line_coords:
         try:
-            line_strings = [LineString(line) for line in all_lines if line[0] != line[1]]
-            # Merge nearby lines
-            merged = unary_union(line_strings)
+            segments = np.asarray(line_coords, dtype=np.float64).reshape(-1, 2, 2)
+            # Drop zero-length segments
+            segments = segments[(segments[:, 0] != segments[:, 1]).any(axis=1)]
+            # Build all LineStrings in one GEOS call
+            line_strings = shapely.linestrings(segments)
+            # Split lines at every intersection; node() does only the noding
+            # and duplicate removal, without unary_union's full overlay
+            noded = shapely.node(shapely.multilinestrings(line_strings))
             # Attempt to form polygons from closed line loops
-            formed_polys = list(polygonize(merged))
+            formed_polys = list(polygonize(shapely.get_parts(noded)))
             
             print(f"    Formed {len(formed_polys)} polygons from line segments")
             
@@ -212,6 +262,9 @@ def extract_page_vectors(page: fitz.Page, page_number: int) -> Dict[str, Any]:
     # Detect scale from the page
     scale_factor = detect_scale_from_vectors(page)
     
+    # Classify based on fill color and geometry, all polygons at once
+    surface_types = classify_polygons(filtered_polygons)
+    
     # Convert to output format
     output_polygons = []
     for idx, poly_data in enumerate(filtered_polygons):
@@ -232,23 +285,21 @@ def extract_page_vectors(page: fitz.Page, page_number: int) -> Dict[str, Any]:
         else:
             area_sqft = pdf_area  # Raw PDF units
         
-        # Classify based on fill color and geometry
-        surface_type = classify_polygon(poly_data, geom)
+        surface_type = surface_types[idx]
+        
+        # Round all coordinates and the bbox in single NumPy passes
+        minx, miny, maxx, maxy = geom.bounds
+        bx, by, bw, bh = np.round((minx, miny, maxx - minx, maxy - miny), 2).tolist()
         
         output_polygons.append({
             "id": f"page{page_number}_poly{idx}",
-            "coordinates": [[round(c[0], 2), round(c[1], 2)] for c in coords],
+            "coordinates": np.round(np.asarray(coords, dtype=np.float64)[:, :2], 2).tolist(),
             "area_pdf_units": round(pdf_area, 2),
             "area_sqft": round(area_sqft, 2),
             "type": surface_type,
             "fill_color": poly_data.get("fill_color"),
             "source": poly_data.get("source"),
-            "bbox": {
-                "x": round(geom.bounds[0], 2),
-                "y": round(geom.bounds[1], 2),
-                "w": round(geom.bounds[2] - geom.bounds[0], 2),
-                "h": round(geom.bounds[3] - geom.bounds[1], 2)
-            }
+            "bbox": {"x": bx, "y": by, "w": bw, "h": bh}
         })
     
     # Count by type for debugging
@@ -279,45 +330,71 @@ def filter_polygons(
     Filter out noise and border polygons.
     """
     
+    if not polygons:
+        return []
+    
     page_area = page_width * page_height
     min_area = page_area * min_area_ratio
     max_area = page_area * max_area_ratio
     
-    filtered = []
-    seen_bounds = set()
+    # Pull areas and bounds for all candidates in bulk GEOS calls
+    geoms = np.array([p["geometry"] for p in polygons], dtype=object)
+    areas = shapely.area(geoms)
+    bounds = shapely.bounds(geoms)
+    width = bounds[:, 2] - bounds[:, 0]
+    height = bounds[:, 3] - bounds[:, 1]
     
-    for poly_data in polygons:
-        geom = poly_data["geometry"]
-        area = geom.area
-        
-        # Area filters
-        if area < min_area or area > max_area:
-            continue
-        
-        # Dimension filters (reject things spanning full page - likely borders)
-        bounds = geom.bounds
-        width = bounds[2] - bounds[0]
-        height = bounds[3] - bounds[1]
-        
-        # Only reject if BOTH dimensions are very large (actual page border)
-        if width > page_width * 0.95 and height > page_height * 0.95:
-            continue
-        
-        # Aspect ratio filter (reject very thin shapes - likely lines)
-        aspect = max(width, height) / (min(width, height) + 0.1)
-        if aspect > 30:  # Relaxed from 20
-            continue
-        
-        # Deduplicate by bounds (with coarser rounding to catch near-duplicates)
-        bounds_key = (round(bounds[0], 0), round(bounds[1], 0), 
-                      round(bounds[2], 0), round(bounds[3], 0))
-        if bounds_key in seen_bounds:
-            continue
-        seen_bounds.add(bounds_key)
-        
-        filtered.append(poly_data)
+    # Area filters
+    keep = (areas >= min_area) & (areas <= max_area)
+    
+    # Dimension filters (reject things spanning full page - likely borders)
+    # Only reject if BOTH dimensions are very large (actual page border)
+    keep &= ~((width > page_width * 0.95) & (height > page_height * 0.95))
+    
+    # Aspect ratio filter (reject very thin shapes - likely lines)
+    aspect = np.maximum(width, height) / (np.minimum(width, height) + 0.1)
+    keep &= aspect <= 30  # Relaxed from 20
     
-    return filtered
+    kept_indices = np.flatnonzero(keep)
+    if len(kept_indices) == 0:
+        return []
+    
+    # Deduplicate overlapping polygons, keeping the first occurrence in input order
+    duplicate = _find_duplicates(geoms[kept_indices])
+    
+    return [polygons[i] for i in kept_indices[~duplicate]]
+
+
+def _find_duplicates(geoms: np.ndarray, iou_threshold: float = 0.5) -> np.ndarray:
+    """
+    Flag geometries that overlap an earlier, non-duplicate geometry by IoU > iou_threshold.
+    Candidate pairs come from an STRtree, so IoU is only computed for overlapping bounding boxes.
+    """
+    
+    duplicate = np.zeros(len(geoms), dtype=bool)
+    
+    tree = STRtree(geoms)
+    later, earlier = tree.query(geoms)
+    pairs = earlier < later
+    later, earlier = later[pairs], earlier[pairs]
+    if len(later) == 0:
+        return duplicate
+    
+    # Intersection over union for each candidate pair
+    a, b = geoms[later], geoms[earlier]
+    inter_area = shapely.area(shapely.intersection(a, b))
+    union_area = shapely.area(shapely.union(a, b))
+    iou = np.divide(inter_area, union_area, out=np.zeros_like(inter_area), where=union_area > 0)
+    
+    overlapping = iou > iou_threshold
+    later, earlier = later[overlapping], earlier[overlapping]
+    
+    # Resolve in input order so a polygon is only dropped for matching a kept one
+    for i in np.lexsort((earlier, later)):
+        if not duplicate[earlier[i]]:
+            duplicate[later[i]] = True
+    
+    return duplicate
 
 
 def detect_scale_from_vectors(page: fitz.Page) -> Optional[float]:
@@ -330,10 +407,8 @@ def detect_scale_from_vectors(page: fitz.Page) -> Optional[float]:
     text = page.get_text()
     
     # Common scale patterns in civil plans
-    import re
-    
     # Pattern: "1" = 20'" or "SCALE: 1"=20'"
-    scale_match = re.search(r'1["\']?\s*=\s*(\d+)["\']?', text)
+    scale_match = _SCALE_INCH_RE.search(text)
     if scale_match:
         feet_per_inch = int(scale_match.group(1))
         # PDF default is 72 points per inch
@@ -345,7 +420,7 @@ def detect_scale_from_vectors(page: fitz.Page) -> Optional[float]:
         return feet_per_pdf_unit
     
     # Try to find graphic scale bar (e.g., "0 40 80 Feet")
-    scale_bar_match = re.search(r'(\d+)\s+(\d+)\s+(\d+)?\s*(?:FEET|FT|\')', text, re.IGNORECASE)
+    scale_bar_match = _SCALE_BAR_RE.search(text)
     if scale_bar_match:
         # This gives us the labeled distances, but we'd need to measure the bar length
         # For now, use a reasonable default for civil plans
@@ -367,84 +442,93 @@ def classify_polygon(poly_data: Dict, geom: Polygon) -> str:
     Uses fill color, shape metrics, and area to determine surface type.
     """
     
-    fill = poly_data.get("fill_color")
-    source = poly_data.get("source")
+    return classify_polygons([{**poly_data, "geometry": geom}])[0]
+
+
+def classify_polygons(polygons: List[Dict]) -> List[str]:
+    """
+    Classify a batch of polygons based on their properties.
+    Same rules as classify_polygon, evaluated as array masks over all polygons.
+    
+    Args:
+        polygons: Polygon dicts with "geometry" and optional "fill_color"
+        
+    Returns:
+        Surface type for each polygon, in input order
+    """
+    
+    if not polygons:
+        return []
+    
+    # Fill colors as (N, 3); polygons without a usable fill get NaN, which fails every color test
+    no_fill = (np.nan, np.nan, np.nan)
+    fills = np.array([
+        fill[:3] if isinstance(fill, tuple) and len(fill) >= 3 else no_fill
+        for fill in (p.get("fill_color") for p in polygons)
+    ], dtype=np.float64)
+    r, g, b = fills[:, 0], fills[:, 1], fills[:, 2]
     
     # Calculate shape metrics
-    area = geom.area
-    perimeter = geom.length
-    bounds = geom.bounds
-    width = bounds[2] - bounds[0]
-    height = bounds[3] - bounds[1]
+    geoms = np.array([p["geometry"] for p in polygons], dtype=object)
+    area = shapely.area(geoms)
+    perimeter = shapely.length(geoms)
+    bounds = shapely.bounds(geoms)
+    width = bounds[:, 2] - bounds[:, 0]
+    height = bounds[:, 3] - bounds[:, 1]
     
     # Rectangularity (how close to a rectangle)
     rect_area = width * height
-    rectangularity = area / rect_area if rect_area > 0 else 0
+    rectangularity = np.divide(area, rect_area, out=np.zeros_like(area), where=rect_area > 0)
     
     # Compactness (circle = 1, complex shapes < 1)
-    compactness = (4 * np.pi * area) / (perimeter ** 2) if perimeter > 0 else 0
-    
-    # Number of vertices (simplified polygon)
-    num_vertices = len(list(geom.exterior.coords)) - 1  # -1 because first=last
-    
-    # Classification logic based on fill color
-    if fill:
-        if isinstance(fill, tuple) and len(fill) >= 3:
-            r, g, b = fill[0], fill[1], fill[2]
-            
-            # Very dark (black) = typically building or heavy structure
-            if r < 0.2 and g < 0.2 and b < 0.2:
-                return "building"
-            
-            # Dark gray = asphalt
-            if r < 0.4 and g < 0.4 and b < 0.4 and abs(r - g) < 0.1:
-                return "asphalt"
-            
-            # Medium gray = concrete
-            if 0.4 <= r <= 0.85 and abs(r - g) < 0.15 and abs(r - b) < 0.15:
-                return "concrete"
-            
-            # Light gray (near white) = could be concrete or building
-            if r > 0.85 and g > 0.85 and b > 0.85:
-                if rectangularity > 0.85 and num_vertices <= 6:
-                    return "building"
-                return "concrete"
-            
-            # Green tint = pervious/grass
-            if g > r * 1.1 and g > b * 1.1:
-                return "pervious"
-            
-            # Blue tint = water/pond
-            if b > r * 1.2 and b > g * 1.1:
-                return "water"
-            
-            # Red/brown tint = could be building
-            if r > g * 1.2 and r > b * 1.2:
-                return "building"
-    
-    # Shape-based classification (when no fill color)
-    # Highly rectangular with few vertices = likely building
-    if rectangularity > 0.88 and num_vertices <= 8:
-        # Large rectangular shapes are likely buildings
-        if area > 1000:  # Significant size in PDF units
-            return "building"
-        return "concrete"
-    
-    # Moderately rectangular = concrete/paving
-    if rectangularity > 0.6:
-        return "concrete"
-    
-    # Compact shapes could be various things
-    if compactness > 0.7:
-        return "concrete"
+    perimeter_sq = perimeter ** 2
+    compactness = np.divide(4 * np.pi * area, perimeter_sq, out=np.zeros_like(area), where=perimeter > 0)
+    
+    # Number of vertices (simplified polygon), -1 because first=last
+    num_vertices = shapely.get_num_coordinates(shapely.get_exterior_ring(geoms)) - 1
+    
+    # Fill color rules, in priority order
+    light = (r > 0.85) & (g > 0.85) & (b > 0.85)
+    conditions = [
+        # Very dark (black) = typically building or heavy structure
+        (r < 0.2) & (g < 0.2) & (b < 0.2),
+        # Dark gray = asphalt
+        (r < 0.4) & (g < 0.4) & (b < 0.4) & (np.abs(r - g) < 0.1),
+        # Medium gray = concrete
+        (r >= 0.4) & (r <= 0.85) & (np.abs(r - g) < 0.15) & (np.abs(r - b) < 0.15),
+        # Light gray (near white) = could be concrete or building
+        light & (rectangularity > 0.85) & (num_vertices <= 6),
+        light,
+        # Green tint = pervious/grass
+        (g > r * 1.1) & (g > b * 1.1),
+        # Blue tint = water/pond
+        (b > r * 1.2) & (b > g * 1.1),
+        # Red/brown tint = could be building
+        (r > g * 1.2) & (r > b * 1.2),
+    ]
+    choices = ["building", "asphalt", "concrete", "building", "concrete", "pervious", "water", "building"]
+    
+    # Shape-based rules (when no fill color decides)
+    # Highly rectangular with few vertices = likely building if large, else concrete
+    rectangular = (rectangularity > 0.88) & (num_vertices <= 8)
+    conditions += [
+        rectangular & (area > 1000),  # Significant size in PDF units
+        rectangular,
+        # Moderately rectangular = concrete/paving
+        rectangularity > 0.6,
+        # Compact shapes could be various things
+        compactness > 0.7,
+    ]
+    choices += ["building", "concrete", "concrete", "concrete"]
     
     # Default to pervious for irregular/organic shapes
-    return "pervious"
+    return np.select(conditions, choices, default="pervious").tolist()
 
 
-def get_page_as_image_base64(page: fitz.Page, dpi: int = 150) -> str:
+def get_page_as_image_base64(page: fitz.Page, dpi: int = 150, fmt: str = "png") -> str:
     """
-    Render a PDF page to a base64-encoded PNG image.
+    Render a PDF page to a base64-encoded image data URL.
+    fmt="jpeg" encodes several times faster than PNG on large pages.
     """
     import base64
     
@@ -453,10 +537,28 @@ def get_page_as_image_base64(page: fitz.Page, dpi: int = 150) -> str:
     mat = fitz.Matrix(zoom, zoom)
     pix = page.get_pixmap(matrix=mat)
     
-    # Convert to PNG bytes
-    png_bytes = pix.tobytes("png")
+    # Convert to image bytes
+    if fmt == "jpeg":
+        image_bytes = pix.tobytes("jpg", jpg_quality=85)
+    else:
+        image_bytes = pix.tobytes("png")
     
     # Encode to base64
-    b64 = base64.b64encode(png_bytes).decode('utf-8')
+    b64 = base64.b64encode(image_bytes).decode('utf-8')
+    
+    return f"data:image/{fmt};base64,{b64}"
+
+
+def get_page_as_ndarray(page: fitz.Page, dpi: int = 100) -> np.ndarray:
+    """
+    Render a PDF page to an (H, W, channels) uint8 array for in-process CV work.
+    Skips image encoding; the pixels are copied once out of the pixmap so the
+    array is writable and doesn't depend on the pixmap staying alive.
+    """
+    
+    zoom = dpi / 72  # 72 is default PDF DPI
+    mat = fitz.Matrix(zoom, zoom)
+    pix = page.get_pixmap(matrix=mat, alpha=False)
     
-    return f"data:image/png;base64,{b64}"
+    # samples_mv is a view on the pixmap buffer (samples would make an extra bytes copy)
+    return np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.h, pix.w, pix.n).copy()
@@ -3,138 +3,268 @@ Installation Test Script
 Run this to verify all dependencies are correctly installed
 """
 
+import os
 import sys
+import json
+import argparse
+import shutil
+import subprocess
+import functools
+import importlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Tuple
+
+# Interpreter version, read once at import
+_PY = sys.version_info
+
+# Default Tesseract location on Windows (same as modules/scaler.py)
+TESSERACT_WIN_PATH = r"C:\\Program Files\\Tesseract-OCR\\tesseract.exe"
+
+# Required Python packages as (module name, display name)
+_PACKAGES: Tuple[Tuple[str, str], ...] = (
+    ('fastapi', 'FastAPI'),
+    ('uvicorn', 'Uvicorn'),
+    ('fitz', 'PyMuPDF'),
+    ('cv2', 'OpenCV'),
+    ('pytesseract', 'Tesseract OCR'),
+    ('PIL', 'Pillow'),
+    ('shapely', 'Shapely'),
+    ('numpy', 'NumPy'),
+    ('numba', 'Numba'),
+    ('orjson', 'orjson'),
+)
+
+# Packages only checked for presence; their import chains (FastAPI, GEOS, LLVM) are slow
+_PROBE_ONLY = frozenset({'fastapi', 'uvicorn', 'PIL', 'shapely', 'numba'})
+
+
+def _lazy(name):
+    """
+    Import a module on first use rather than when this script is loaded
+    (e.g. during pytest collection). Later calls are a sys.modules lookup.
+    """
+    return importlib.import_module(name)
+
+
+@functools.lru_cache(maxsize=None)
+def _probe(name):
+    """Check whether a module can be found without importing it (cached per name)."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):  # Broken or partially installed package
+        return False
+
 
 def test_python_version():
-    """Check Python version"""
-    version = sys.version_info
-    print(f"Python version: {version.major}.{version.minor}.{version.micro}")
-    if version.major >= 3 and version.minor >= 9:
-        print("✓ Python version OK")
-        return True
+    """
+    Check Python version
+    
+    Returns:
+        (ok, message)
+    """
+    message = f"Python version: {_PY.major}.{_PY.minor}.{_PY.micro}\n"
+    if _PY >= (3, 9):
+        return True, message + "✓ Python version OK"
     else:
-        print("✗ Python 3.9+ required")
-        return False
+        return False, message + "✗ Python 3.9+ required"
 
 
 def test_imports():
-    """Test all required package imports"""
-    packages = [
-        ('fastapi', 'FastAPI'),
-        ('uvicorn', 'Uvicorn'),
-        ('pdf2image', 'PDF2Image'),
-        ('cv2', 'OpenCV'),
-        ('pytesseract', 'Tesseract OCR'),
-        ('PIL', 'Pillow'),
-        ('shapely', 'Shapely'),
-        ('numpy', 'NumPy')
-    ]
-
+    """
+    Test all required packages are installed
+    
+    Packages in _PROBE_ONLY are only located with find_spec, which skips
+    their (slow) import chains. The rest are really imported so broken
+    native libraries show up here.
+    
+    Returns:
+        (ok, message) with one line per package
+    """
     all_ok = True
+    lines = []
 
-    for module_name, display_name in packages:
+    for module_name, display_name in _PACKAGES:
         try:
-            __import__(module_name)
-            print(f"✓ {display_name} installed")
-        except ImportError:
-            print(f"✗ {display_name} NOT installed")
+            if module_name in _PROBE_ONLY:
+                found = _probe(module_name)
+                status = "available"
+            else:
+                __import__(module_name)
+                found = True
+                status = "installed"
+        except (ImportError, ValueError):  # Missing, broken or partially installed package
+            found = False
+        
+        if found:
+            lines.append(f"✓ {display_name} {status}")
+        else:
+            lines.append(f"✗ {display_name} NOT installed")
             all_ok = False
 
-    return all_ok
+    return all_ok, "\n".join(lines)
 
 
 def test_poppler():
-    """Test Poppler installation"""
-    try:
-        from pdf2image.exceptions import PDFInfoNotInstalledError
-        from pdf2image import pdfinfo_from_path
+    """
+    Test Poppler installation
+    
+    Looks for the Poppler binaries on PATH. PDFs are rendered with PyMuPDF,
+    so a missing Poppler is reported but doesn't fail the check, and the
+    lookup is skipped entirely unless the pdf2image wrapper is installed.
+    
+    Returns:
+        (ok, message)
+    """
+    if not _probe('pdf2image'):
+        return True, "⚠ Poppler check skipped: pdf2image not installed (optional, PDFs are rendered with PyMuPDF)"
 
-        # Try to use poppler
-        # This will fail if poppler is not installed
-        print("Testing Poppler...")
-        print("✓ Poppler is accessible")
-        return True
+    missing = [tool for tool in ('pdfinfo', 'pdftoppm') if shutil.which(tool) is None]
 
-    except PDFInfoNotInstalledError:
-        print("✗ Poppler NOT installed or not in PATH")
-        return False
-    except Exception as e:
-        print(f"⚠ Poppler test inconclusive: {str(e)}")
-        return True  # Don't fail on inconclusive
+    if not missing:
+        return True, "✓ Poppler is accessible (pdfinfo, pdftoppm)"
+    return True, f"⚠ Poppler not found in PATH ({', '.join(missing)}); optional, PDFs are rendered with PyMuPDF"
 
 
 def test_tesseract():
-    """Test Tesseract OCR installation"""
+    """
+    Test Tesseract OCR installation
+    
+    Returns:
+        (ok, message)
+    """
+    # Same lookup as modules/scaler.py: PATH first, then the default Windows install
+    exe = shutil.which('tesseract')
+    if exe is None and os.path.exists(TESSERACT_WIN_PATH):
+        exe = TESSERACT_WIN_PATH
+    if exe is None:
+        return False, "✗ Tesseract NOT installed or not in PATH"
+
     try:
-        import pytesseract
-        version = pytesseract.get_tesseract_version()
-        print(f"✓ Tesseract OCR installed (version {version})")
-        return True
+        proc = subprocess.run([exe, '--version'], capture_output=True, text=True, timeout=2)
+        # Older releases print the version banner to stderr
+        output = (proc.stdout or proc.stderr).strip()
+        version = output.splitlines()[0] if output else "unknown version"
+        return True, f"✓ Tesseract OCR installed ({version})"
     except Exception as e:
-        print(f"✗ Tesseract NOT installed or not in PATH: {str(e)}")
-        return False
+        return False, f"✗ Tesseract NOT installed or not in PATH: {str(e)}"
 
 
 def test_opencv():
-    """Test OpenCV functionality"""
+    """
+    Test OpenCV functionality
+    
+    Returns:
+        (ok, message)
+    """
     try:
-        import cv2
-        import numpy as np
+        cv2 = _lazy('cv2')
+    except ImportError:
+        return False, "✗ OpenCV NOT installed"
 
-        # Create a simple test image
-        test_img = np.zeros((100, 100), dtype=np.uint8)
-        edges = cv2.Canny(test_img, 50, 150)
+    try:
+        # Run one tiny image through Canny to prove the image pipeline works
+        cv2.Canny(_smoke_image(), 50, 150)
+        version = cv2.__version__
 
-        print("✓ OpenCV functioning correctly")
-        return True
+        return True, f"✓ OpenCV functioning correctly (version {version})"
     except Exception as e:
-        print(f"✗ OpenCV test failed: {str(e)}")
-        return False
+        return False, f"✗ OpenCV test failed: {str(e)}"
 
 
-def main():
-    print("=" * 50)
-    print("Module A - Installation Test")
-    print("=" * 50)
-    print()
+@functools.lru_cache(maxsize=None)
+def _smoke_image():
+    """8x8 blank image for the OpenCV smoke test, allocated once per process."""
+    np = _lazy('numpy')
+    return np.zeros((8, 8), dtype=np.uint8)
 
-    results = []
 
-    print("[1/5] Testing Python version...")
-    results.append(test_python_version())
-    print()
+# Installation checks in report order as (label, check)
+_STEPS = (
+    ('Python version', test_python_version),
+    ('Python packages', test_imports),
+    ('Poppler', test_poppler),
+    ('Tesseract OCR', test_tesseract),
+    ('OpenCV', test_opencv),
+)
 
-    print("[2/5] Testing Python packages...")
-    results.append(test_imports())
-    print()
+# The first steps gate everything after them; the remaining subsystem checks
+# (binary lookups, subprocess spawns, library loads) are independent
+_PREREQUISITE_STEPS = 2
 
-    print("[3/5] Testing Poppler...")
-    results.append(test_poppler())
-    print()
 
-    print("[4/5] Testing Tesseract OCR...")
-    results.append(test_tesseract())
-    print()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify Module A dependencies are installed")
+    parser.add_argument('--json', action='store_true',
+                        help='print {check: true/false/null (skipped)} as JSON instead of the report')
+    args = parser.parse_args(argv)
 
-    print("[5/5] Testing OpenCV...")
-    results.append(test_opencv())
-    print()
+    # (ok, message) per step, None when skipped
+    step_results = [None] * len(_STEPS)
+
+    # Later checks are meaningless without a supported interpreter and the
+    # Python packages, so stop at the first failure and mark the rest skipped
+    for i, (_, check) in enumerate(_STEPS[:_PREREQUISITE_STEPS]):
+        step_results[i] = check()
+        if not step_results[i][0]:
+            break
+    else:
+        # Run the subsystem checks concurrently; they're reported in step order below
+        with ThreadPoolExecutor(max_workers=len(_STEPS) - _PREREQUISITE_STEPS) as executor:
+            futures = {
+                executor.submit(check): i
+                for i, (_, check) in enumerate(_STEPS) if i >= _PREREQUISITE_STEPS
+            }
+            for future in as_completed(futures):
+                step_results[futures[future]] = future.result()
 
-    print("=" * 50)
+    results = [result is not None and result[0] for result in step_results]
+    exit_code = 0 if all(results) else 1
+
+    if args.json:
+        summary = {label: None if result is None else result[0] for (label, _), result in zip(_STEPS, step_results)}
+        sys.stdout.write(json.dumps(summary) + "\n")
+        sys.stdout.flush()
+        return exit_code
+
+    # Output is collected and written once at the end
+    out = [
+        "=" * 50,
+        "Module A - Installation Test",
+        "=" * 50,
+        "",
+    ]
+
+    for step, ((label, _), result) in enumerate(zip(_STEPS, step_results), 1):
+        if result is None:
+            out += [f"[{step}/{len(_STEPS)}] Testing {label}... skipped", ""]
+        else:
+            out += [f"[{step}/{len(_STEPS)}] Testing {label}...", result[1], ""]
+
+    out.append("=" * 50)
 
     if all(results):
-        print("✓ ALL TESTS PASSED")
-        print("You're ready to run Module A!")
-        print()
-        print("Start the backend with:")
-        print("  python main.py")
+        out += [
+            "✓ ALL TESTS PASSED",
+            "You're ready to run Module A!",
+            "",
+            "Start the backend with:",
+            "  python main.py",
+        ]
     else:
-        print("✗ SOME TESTS FAILED")
-        print("Please install missing dependencies.")
-        print("See README.md for installation instructions.")
+        out += [
+            "✗ SOME TESTS FAILED",
+            "Please install missing dependencies.",
+            "See README.md for installation instructions.",
+        ]
+
+    out.append("=" * 50)
+
+    sys.stdout.write("\n".join(out) + "\n")
+    sys.stdout.flush()
 
-    print("=" * 50)
+    return exit_code
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
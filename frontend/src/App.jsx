@@ -8,14 +8,14 @@ function App() {
   const [results, setResults] = useState(null)
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState(null)
-  const [progress, setProgress] = useState({ currentSheet: 0, totalSheets: 0, status: 'idle' })
+  const [progress, setProgress] = useState({ sheetsCompleted: 0, totalSheets: 0, status: 'idle' })
   const pollIntervalRef = useRef(null)
 
   const handleFileUpload = async (file) => {
     setLoading(true)
     setError(null)
     setResults(null)
-    setProgress({ currentSheet: 0, totalSheets: 0, status: 'starting' })
+    setProgress({ sheetsCompleted: 0, totalSheets: 0, status: 'starting' })
 
     try {
       const { job_id: jobId } = await startProcessJob(file)
@@ -27,7 +27,7 @@ function App() {
           const status = await getProcessStatus(jobId)
 
           setProgress({
-            currentSheet: status.current_sheet || 0,
+            sheetsCompleted: status.sheets_completed || 0,
             totalSheets: status.total_sheets || 0,
             status: status.status || 'unknown'
           })
@@ -87,7 +87,7 @@ function App() {
               <p>Processing PDF... This may take a while for large plan sets.</p>
               {progress.totalSheets > 0 && (
                 <p>
-                  Sheet {progress.currentSheet} of {progress.totalSheets}
+                  {progress.sheetsCompleted} of {progress.totalSheets} sheets processed
                 </p>
               )}
             </div>